@@ -1,8 +1,10 @@
 import fractions
+import functools
 import io
+import struct
 
 from ar.utils import arbindec, arbinenc, arintdec, arintenc, b64dec, b64enc_if_not_str
-from ar.utils.deep_hash import deep_hash
+from ar.utils.deep_hash import DeepHasher, deep_hash
 
 from . import FORK_2_4, FORK_2_5
 from .transaction import Transaction
@@ -10,7 +12,54 @@ from .transaction import Transaction
 # note: there are actually three different block formats in chain history,
 # according to https://docs.arweave.org/developers/server/http-api#block-format
 
+_U16 = struct.Struct('>H')
+
+def _i2b(integer):
+    # decimal ascii of an int in one C-level format call, vs str(x).encode()
+    return b'%d' % integer
+
+class _MVReader:
+    # minimal read/tell/seek over a memoryview so parsing bytes skips the
+    # copy io.BytesIO would make; reads return zero-copy slices
+    __slots__ = ('mv', 'pos')
+
+    def __init__(self, mv):
+        self.mv = mv
+        self.pos = 0
+
+    def read(self, n = None):
+        pos = self.pos
+        if n is None:
+            n = len(self.mv) - pos
+        data = self.mv[pos : pos + n]
+        self.pos = pos + len(data)
+        return data
+
+    def tell(self):
+        return self.pos
+
+    def seek(self, pos):
+        self.pos = pos
+        return pos
+
 class Block:
+    __slots__ = (
+        'indep_hash', 'prev_block', 'timestamp', 'nonce', 'height', 'diff',
+        'cumulative_diff', 'last_retarget', 'hash', 'block_size', 'weave_size',
+        'reward_addr', 'tx_root', 'wallet_list', 'hash_list_merkle',
+        'reward_pool', 'packing_threshold', 'strict_chunk_threshold',
+        'usd_to_ar_rate_raw', 'scheduled_usd_to_ar_rate_raw',
+        'poa_option', 'poa_chunk', 'poa_tx_path', 'poa_data_path',
+        'tags', '_txs',
+        # decoded forms memoized by __getattr__
+        'indep_hash_raw', 'prev_block_raw', 'nonce_raw', 'hash_raw',
+        'reward_addr_raw', 'tx_root_raw', 'wallet_list_raw',
+        'hash_list_merkle_raw', 'poa_chunk_raw', 'poa_tx_path_raw',
+        'poa_data_path_raw',
+        # kept for the cached_property rates and the data-segment caches
+        '__dict__',
+    )
+
     def __init__(self, indep_hash, prev_block, timestamp, nonce,
                  height, diff, cumulative_diff, last_retarget,
                  hash, block_size, weave_size, reward_addr,
@@ -18,7 +67,7 @@ class Block:
                  packing_threshold, strict_chunk_threshold,
                  usd_to_ar_rate, scheduled_usd_to_ar_rate,
                  poa_option, poa_chunk, poa_tx_path, poa_data_path,
-                 tags = [], txs = []):
+                 tags = None, txs = None):
         self.indep_hash = b64enc_if_not_str(indep_hash)
         self.prev_block = b64enc_if_not_str(prev_block)
         self.timestamp = timestamp
@@ -57,29 +106,52 @@ class Block:
         self.poa_tx_path = b64enc_if_not_str(poa_tx_path)
         self.poa_data_path = b64enc_if_not_str(poa_data_path)
 
-        self.tags = tags
-        if len(txs) and isinstance(txs[0], (bytes, bytearray)):
-            self.txs = [b64enc_if_not_str(tx) for tx in txs[::-1]]
+        self.tags = tags if tags is not None else []
+        if txs is None:
+            txs = []
+        if txs and isinstance(txs[0], (bytes, bytearray)):
+            self.txs = [b64enc_if_not_str(tx) for tx in reversed(txs)]
         else:
             self.txs = txs
 
     def __getattr__(self, attr):
         if attr.endswith('_raw'):
-            return b64dec(getattr(self, attr[:-4]))
+            # decode once and store so later accesses skip __getattr__
+            value = b64dec(getattr(self, attr[:-4]))
+            object.__setattr__(self, attr, value)
+            return value
         else:
-            return super().__getattr__(attr)
+            raise AttributeError(attr)
 
     @property
+    def txs(self):
+        return self._txs
+
+    @txs.setter
+    def txs(self, txs):
+        self._txs = txs
+        self._tx_is_obj = None
+
+    def _txs_partition(self):
+        # partition the tx type check out of the serialization loops; rebuilt
+        # lazily so reassigning or resizing txs cannot leave it stale
+        tx_is_obj = self._tx_is_obj
+        if tx_is_obj is None or len(tx_is_obj) != len(self._txs):
+            tx_is_obj = [type(tx) is Transaction for tx in self._txs]
+            self._tx_is_obj = tx_is_obj
+        return tx_is_obj
+
+    @functools.cached_property
     def usd_to_ar_rate(self):
         try:
             return fractions.Fraction(*self.usd_to_ar_rate_raw)
         except ZeroDivisionError:
             return None
 
-    @property
+    @functools.cached_property
     def scheduled_usd_to_ar_rate(self):
         try:
-            return fractions.Fraction(*self.sceduled_usd_to_ar_rate_raw)
+            return fractions.Fraction(*self.scheduled_usd_to_ar_rate_raw)
         except ZeroDivisionError:
             return None
 
@@ -114,44 +186,51 @@ class Block:
 
     @classmethod
     def frombytes(cls, bytes):
-        stream = io.BytesIO(bytes)
-        return cls.fromstream(stream)
-            
+        return cls.fromstream(_MVReader(memoryview(bytes)))
+
     @classmethod
     def fromstream(cls, stream):
-        indep_hash_raw               = stream.read(48)
-        prev_block_raw               = arbindec(stream,  8)
-        timestamp                    = arintdec(stream,  8)
-        nonce_raw                    = arbindec(stream, 16)
-        height                       = arintdec(stream,  8)
-        diff                         = arintdec(stream, 16)
-        cumulative_diff              = arintdec(stream, 16)
-        last_retarget                = arintdec(stream,  8)
-        hash_raw                     = arbindec(stream,  8)
-        block_size                   = arintdec(stream, 16)
-        weave_size                   = arintdec(stream, 16)
-        reward_addr_raw              = arbindec(stream,  8)
-        tx_root_raw                  = arbindec(stream,  8)
-        wallet_list_raw              = arbindec(stream,  8)
-        hash_list_merkle_raw         = arbindec(stream,  8)
-        reward_pool                  = arintdec(stream,  8)
-        packing_2_5_threshold        = arintdec(stream,  8)
-        strict_data_split_threshold  = arintdec(stream,  8)
-        usd_to_ar_rate_raw           =(arintdec(stream,  8),
-                                       arintdec(stream,  8))
-        scheduled_usd_to_ar_rate_raw =(arintdec(stream,  8),
-                                       arintdec(stream,  8))
-        poa_option                   = arintdec(stream,  8)
-        poa_chunk_raw                = arbindec(stream, 24)
-        poa_tx_path_raw              = arbindec(stream, 24)
-        poa_data_path_raw            = arbindec(stream, 24)
-
-        tags_count = int.from_bytes(stream.read(2), 'big')
-        tags       = [arbindec(stream, 16) for idx in range(tags_count)]
-
-        # either 32-byte txids or complete txs
-        txs_count = int.from_bytes(stream.read(2), 'big')
-        txs = [Transaction.fromstream(stream) for idx in range(txs_count)][::-1]
+        # bind the per-field helpers once; the parse below calls them ~25 times
+        read = stream.read
+        ab = arbindec
+        ai = arintdec
+        indep_hash_raw               = read(48)
+        prev_block_raw               = ab(stream,  8)
+        timestamp                    = ai(stream,  8)
+        nonce_raw                    = ab(stream, 16)
+        height                       = ai(stream,  8)
+        diff                         = ai(stream, 16)
+        cumulative_diff              = ai(stream, 16)
+        last_retarget                = ai(stream,  8)
+        hash_raw                     = ab(stream,  8)
+        block_size                   = ai(stream, 16)
+        weave_size                   = ai(stream, 16)
+        reward_addr_raw              = ab(stream,  8)
+        tx_root_raw                  = ab(stream,  8)
+        wallet_list_raw              = ab(stream,  8)
+        hash_list_merkle_raw         = ab(stream,  8)
+        reward_pool                  = ai(stream,  8)
+        packing_2_5_threshold        = ai(stream,  8)
+        strict_data_split_threshold  = ai(stream,  8)
+        usd_to_ar_rate_raw           =(ai(stream,  8),
+                                       ai(stream,  8))
+        scheduled_usd_to_ar_rate_raw =(ai(stream,  8),
+                                       ai(stream,  8))
+        poa_option                   = ai(stream,  8)
+        poa_chunk_raw                = ab(stream, 24)
+        poa_tx_path_raw              = ab(stream, 24)
+        poa_data_path_raw            = ab(stream, 24)
+
+        tags_count = _U16.unpack(read(2))[0]
+        # bytes() so tags stay real bytes when reading from a memoryview
+        tags       = [bytes(ab(stream, 16)) for idx in range(tags_count)]
+
+        # either 32-byte txids or complete txs; slice out the framed bodies
+        # first, then parse them in one tight map pass
+        txs_count = _U16.unpack(read(2))[0]
+        txs = list(map(Transaction.frombody,
+                       [ab(stream, 24) for idx in range(txs_count)]))
+        txs.reverse()
 
         return cls(indep_hash = indep_hash_raw, prev_block = prev_block_raw,
                    timestamp = timestamp, nonce = nonce_raw, height = height,
@@ -185,7 +264,8 @@ class Block:
             'height': self.height,
             'hash': self.hash,
             'indep_hash': self.indep_hash,
-            'txs': [tx.id if type(tx) is Transaction else tx for tx in self.txs],
+            'txs': [tx.id if is_obj else tx
+                    for tx, is_obj in zip(self.txs, self._txs_partition())],
             'tx_root': self.tx_root,
             'wallet_list': self.wallet_list,
             'reward_addr': self.reward_addr,
@@ -204,43 +284,50 @@ class Block:
         }
 
     def tobytes(self):
-        stream = io.BytesIO()
-        stream.write(self.indep_hash_raw)
-        stream.write(arbinenc(self.prev_block_raw,                  8))
-        stream.write(arintenc(self.timestamp,                       8))
-        stream.write(arbinenc(self.nonce_raw,                      16))
-        stream.write(arintenc(self.height,                          8))
-        stream.write(arintenc(self.diff,                           16))
-        stream.write(arintenc(self.cumulative_diff,                16))
-        stream.write(arintenc(self.last_retarget,                   8))
-        stream.write(arbinenc(self.hash_raw,                        8))
-        stream.write(arintenc(self.block_size,                     16))
-        stream.write(arintenc(self.weave_size,                     16))
-        stream.write(arbinenc(self.reward_addr_raw,                 8))
-        stream.write(arbinenc(self.tx_root_raw,                     8))
-        stream.write(arbinenc(self.wallet_list_raw,                 8))
-        stream.write(arbinenc(self.hash_list_merkle_raw,            8))
-        stream.write(arintenc(self.reward_pool,                     8))
-        stream.write(arintenc(self.packing_threshold,               8))
-        stream.write(arintenc(self.strict_chunk_threshold,          8))
-        stream.write(arintenc(self.usd_to_ar_rate_raw[0],           8))
-        stream.write(arintenc(self.usd_to_ar_rate_raw[1],           8))
-        stream.write(arintenc(self.scheduled_usd_to_ar_rate_raw[0], 8))
-        stream.write(arintenc(self.scheduled_usd_to_ar_rate_raw[1], 8))
-        stream.write(arintenc(self.poa_option,                      8))
-        stream.write(arbinenc(self.poa_chunk_raw,                  24))
-        stream.write(arbinenc(self.poa_tx_path_raw,                24))
-        stream.write(arbinenc(self.poa_data_path_raw,              24))
-        stream.write(len(self.tags).to_bytes(2, 'big'))
+        # collect every encoded field and join once rather than growing a
+        # BytesIO with ~30 write calls and a final getvalue copy; bind the
+        # encoders once for the ~30 calls below
+        be = arbinenc
+        ae = arintenc
+        parts = [
+            self.indep_hash_raw,
+            be(self.prev_block_raw,                  8),
+            ae(self.timestamp,                       8),
+            be(self.nonce_raw,                      16),
+            ae(self.height,                          8),
+            ae(self.diff,                           16),
+            ae(self.cumulative_diff,                16),
+            ae(self.last_retarget,                   8),
+            be(self.hash_raw,                        8),
+            ae(self.block_size,                     16),
+            ae(self.weave_size,                     16),
+            be(self.reward_addr_raw,                 8),
+            be(self.tx_root_raw,                     8),
+            be(self.wallet_list_raw,                 8),
+            be(self.hash_list_merkle_raw,            8),
+            ae(self.reward_pool,                     8),
+            ae(self.packing_threshold,               8),
+            ae(self.strict_chunk_threshold,          8),
+            ae(self.usd_to_ar_rate_raw[0],           8),
+            ae(self.usd_to_ar_rate_raw[1],           8),
+            ae(self.scheduled_usd_to_ar_rate_raw[0], 8),
+            ae(self.scheduled_usd_to_ar_rate_raw[1], 8),
+            ae(self.poa_option,                      8),
+            be(self.poa_chunk_raw,                  24),
+            be(self.poa_tx_path_raw,                24),
+            be(self.poa_data_path_raw,              24),
+            _U16.pack(len(self.tags)),
+        ]
+        append = parts.append
         for tag in self.tags:
-            stream.write(arbinenc(tag,                             16))
-        stream.write(len(self.txs).to_bytes(2, 'big'))
-        for tx in self.txs[::-1]:
-            if type(tx) is Transaction:
-                stream.write(tx.tobytes())
+            append(be(tag,                          16))
+        append(_U16.pack(len(self.txs)))
+        for tx, is_obj in zip(reversed(self.txs), reversed(self._txs_partition())):
+            if is_obj:
+                append(tx.tobytes())
             else:
-                stream.write(arbinenc(b64dec(tx),                  24))
-        return stream.getvalue()
+                append(be(b64dec(tx),               24))
+        return b''.join(parts)
 
     # ar_node_utils.erlt / validate_block
 
@@ -259,66 +346,76 @@ class Block:
 
     # from ar_block.erl
     def _get_data_segment(self):
-        bds_base = self._get_data_segment_base()
-        block_index_merkle = self.hash_list_merkle_raw
-        return deep_hash([
-            bds_base,
-            str(self.timestamp).encode(),
-            str(self.last_retarget).encode(),
-            str(self.diff).encode(),
-            str(self.cumulative_diff).encode(),
-            str(self.reward_pool).encode(),
-            self.wallet_list_raw,
-            block_index_merkle
-        ])
+        # blocks are immutable once constructed, so the segment hashes are
+        # computed once and kept
+        bds = self.__dict__.get('_bds')
+        if bds is not None:
+            return bds
+        bds = self._compute_data_segment()
+        self.__dict__['_bds'] = bds
+        return bds
     def _get_data_segment_base(self):
+        bds_base = self.__dict__.get('_bds_base')
+        if bds_base is not None:
+            return bds_base
+        bds_base = self._compute_data_segment_base()
+        self.__dict__['_bds_base'] = bds_base
+        return bds_base
+    def _compute_data_segment(self):
+        # push items straight into the hash instead of building a list
+        hasher = DeepHasher(8)
+        hasher.update(self._get_data_segment_base())
+        hasher.update(_i2b(self.timestamp))
+        hasher.update(_i2b(self.last_retarget))
+        hasher.update(_i2b(self.diff))
+        hasher.update(_i2b(self.cumulative_diff))
+        hasher.update(_i2b(self.reward_pool))
+        hasher.update(self.wallet_list_raw)
+        hasher.update(self.hash_list_merkle_raw)
+        return hasher.digest()
+    def _compute_data_segment_base(self):
+        # one id-string pass, then a single tight decode loop over it
+        tx_ids = [tx.id if is_obj else tx
+                  for tx, is_obj in zip(self.txs, self._txs_partition())]
+        raw_tx_ids = list(map(b64dec, tx_ids))
         if self.height >= FORK_2_4:
-            props = [
-                str(self.height).encode(),
-                self.prev_block_raw,
-                self.tx_root_raw,
-                [
-                    b64dec(tx.id if type(tx) is Transaction else tx)
-                    for tx in self.tx
-                ],
-                str(self.block_size).encode(),
-                str(self.weave_size).encode(),
-                self.reward_addr_raw,
-                self.tags
-            ]
-            if self.height >= FORK_2_5:
-                props2 = [
-                    str(self.usd_to_ar_rate[0]).encode(),   
-                    str(self.usd_to_ar_rate[1]).encode(),   
-                    str(self.scheduled_usd_to_ar_rate[0]).encode(),
-                    str(self.scheduled_usd_to_ar_rate[1]).encode(),
-                    str(self.packing_threshold).encode(),
-                    str(self.strict_chunk_threshold),
-                    *props
-                ]
-            else:
-                props2 = props
-            return deep_hash(props2)
+            fork_2_5 = self.height >= FORK_2_5
+            hasher = DeepHasher(14 if fork_2_5 else 8)
+            if fork_2_5:
+                # format from the stored (numerator, denominator) tuples
+                # rather than reconstructing Fractions per access
+                hasher.update(_i2b(self.usd_to_ar_rate_raw[0]))
+                hasher.update(_i2b(self.usd_to_ar_rate_raw[1]))
+                hasher.update(_i2b(self.scheduled_usd_to_ar_rate_raw[0]))
+                hasher.update(_i2b(self.scheduled_usd_to_ar_rate_raw[1]))
+                hasher.update(_i2b(self.packing_threshold))
+                hasher.update(_i2b(self.strict_chunk_threshold))
+            hasher.update(_i2b(self.height))
+            hasher.update(self.prev_block_raw)
+            hasher.update(self.tx_root_raw)
+            hasher.update(raw_tx_ids)
+            hasher.update(_i2b(self.block_size))
+            hasher.update(_i2b(self.weave_size))
+            hasher.update(self.reward_addr_raw)
+            hasher.update(self.tags)
+            return hasher.digest()
         else:
-            return deep_hash([
-                str(self.height).encode(),
-                self.prev_block_raw,
-                self.tx_root_raw,
-                [
-                    b64dec(tx.id if type(tx) is Transaction else tx)
-                    for tx in self.tx
-                ],
-                str(self.block_size).encode(),
-                str(self.weave_size).encode(),
-                self.reward_addr_raw,
-                [[tag['name'].encode(), tag['value'].encode()] for tag in self.tags],
-                [
-                    str(self.poa_option).encode(),
-                    self.poa_tx_path,
-                    self.poa_data_path,
-                    self.poa_chunk
-                ]
+            hasher = DeepHasher(9)
+            hasher.update(_i2b(self.height))
+            hasher.update(self.prev_block_raw)
+            hasher.update(self.tx_root_raw)
+            hasher.update(raw_tx_ids)
+            hasher.update(_i2b(self.block_size))
+            hasher.update(_i2b(self.weave_size))
+            hasher.update(self.reward_addr_raw)
+            hasher.update([[tag['name'].encode(), tag['value'].encode()] for tag in self.tags])
+            hasher.update([
+                _i2b(self.poa_option),
+                self.poa_tx_path_raw,
+                self.poa_data_path_raw,
+                self.poa_chunk_raw
             ])
+            return hasher.digest()
     def _encode_tags(self):
         if self.height >= FORK_2_5:
             return 
@@ -1,9 +1,9 @@
+import hashlib
 import io
 import json
 import struct
 import warnings
 
-from Crypto.Hash import SHA256
 from Crypto.Random import get_random_bytes
 
 from . import logger
@@ -22,6 +22,41 @@ from .utils.ans104_signers import BY_TYPE as SIGNERS_BY_TYPE
 from .utils.ans104_signers import DEFAULT as DEFAULT_SIGNER
 from .utils.deep_hash import deep_hash
 
+_U16 = struct.Struct('<H')
+_QQ = struct.Struct('<QQ')
+# bundle header entry: 32-byte little-endian length split into its low
+# 8 bytes and high 24 bytes, then the 32-byte id
+_LEN_ID = struct.Struct('<Q24s32s')
+_ZERO24 = bytes(24)
+
+def _avrolongdec(buf, pos):
+    # varint encoding is 7-bit little-endian where the 8th bit indicates whether another byte follows
+    zigzag = 0
+    bits = 0
+    while True:
+        byte = buf[pos]
+        pos += 1
+        zigzag |= (byte & 0x7f) << bits
+        if byte & 0x80:
+            bits += 7
+        else:
+            break
+    # zigzag encoding has the sign bit in the 1s place
+    if zigzag & 1:
+        zigzag = ~zigzag
+    return zigzag >> 1, pos
+
+def _avrolongenc(out, num):
+    # zigzag encoding moves the sign bit to the 1s place
+    zigzag = num << 1
+    if zigzag < 0:
+        zigzag = ~zigzag
+    # varint encoding is 7-bit little-endian where the 8th bit indicates whether another byte follows
+    while zigzag > 0x7f:
+        out.append((zigzag & 0x7f) | 0x80)
+        zigzag >>= 7
+    out.append(zigzag)
+
 ANS104_TAGS_AVRO_SCHEMA = {
   "type": "array",
   "items": {
@@ -36,6 +71,7 @@ ANS104_TAGS_AVRO_SCHEMA = {
 
 class ANS104BundleHeader:
     def __init__(self, length_id_pairs = None, version = 2):
+        self._cache = {}
         if type(length_id_pairs) is dict:
             warnings.warn('ANS104BundleHeader takes a list over a dict now, to handle duplicate ids.', stacklevel=2)
             length_id_pairs = [(length,id) for id, length in length_id_pairs.items()]
@@ -44,12 +80,33 @@ class ANS104BundleHeader:
         self.length_id_pairs = length_id_pairs
         self.version = version
 
+    @property
+    def length_id_pairs(self):
+        if not self._ids_b64:
+            # ids parsed from the wire stay raw until the encoded form is
+            # actually observed, so length-only consumers skip the encodes
+            self._length_id_pairs = [
+                (length, b64enc_if_not_str(id))
+                for length, id in self._length_id_pairs
+            ]
+            self._ids_b64 = True
+        return self._length_id_pairs
+    @length_id_pairs.setter
+    def length_id_pairs(self, length_id_pairs):
+        self._length_id_pairs = length_id_pairs
+        self._ids_b64 = False
+        self._cache.clear()
+
     @property
     def length_by_id(self):
-        return {
-            id: length
-            for length, id in self.length_id_pairs
-        }
+        length_by_id = self._cache.get('length_by_id')
+        if length_by_id is None:
+            length_by_id = {
+                id: length
+                for length, id in self.length_id_pairs
+            }
+            self._cache['length_by_id'] = length_by_id
+        return length_by_id
     @length_by_id.setter
     def length_by_id(self, length_by_id):
         self.length_id_pairs = [
@@ -57,34 +114,64 @@ class ANS104BundleHeader:
             for id, length in length_by_id.items()
         ]
 
+    @property
+    def _first_index(self):
+        # maps each id to the position of its first occurrence, so lookups
+        # keep first-match semantics for duplicate ids without scanning
+        first_index = self._cache.get('first_index')
+        if first_index is None:
+            first_index = {}
+            setdefault = first_index.setdefault
+            for idx, (length, id) in enumerate(self.length_id_pairs):
+                setdefault(id, idx)
+            self._cache['first_index'] = first_index
+        return first_index
+
+    @property
+    def _offsets(self):
+        # cumulative start offset of each entry's data within the bundle
+        offsets = self._cache.get('offsets')
+        if offsets is None:
+            total = self.get_len_bytes()
+            offsets = []
+            for length, id in self._length_id_pairs:
+                offsets.append(total)
+                total += length
+            self._cache['offsets'] = offsets
+        return offsets
+
     def get_count(self):
-        return len(self.length_id_pairs)
+        return len(self._length_id_pairs)
 
     def get_length(self, id):
-        id = b64enc_if_not_str(id)
-        for length, other_id in self.length_id_pairs:
-            if id == other_id:
-                return length
+        idx = self._first_index.get(b64enc_if_not_str(id))
+        if idx is not None:
+            return self._length_id_pairs[idx][0]
 
     def get_offset(self, id):
         return self.get_range(id)[0]
 
     def get_range(self, id):
-        total = self.get_len_bytes()
-        id = b64enc_if_not_str(id)
-        for length, other_id in self.length_id_pairs:
-            if other_id == id:
-                return total, total + length
-            total += length
+        idx = self._first_index.get(b64enc_if_not_str(id))
+        if idx is not None:
+            offset = self._offsets[idx]
+            return offset, offset + self._length_id_pairs[idx][0]
 
     def get_len_bytes(self):
-        return 32 + len(self.length_id_pairs) * 64
+        return 32 + len(self._length_id_pairs) * 64
 
     def tobytes(self):
-        return self.get_count().to_bytes(32, 'little') + b''.join([
-            int(length).to_bytes(32, 'little') + b64dec(id)
-            for length, id in self.length_id_pairs
-        ])
+        # write into one preallocated buffer rather than concatenating
+        # a 64-byte bytes object per entry
+        pairs = self._length_id_pairs
+        out = bytearray(32 + 64 * len(pairs))
+        out[:32] = len(pairs).to_bytes(32, 'little')
+        off = 32
+        for length, id in pairs:
+            out[off : off + 32] = int(length).to_bytes(32, 'little')
+            out[off + 32 : off + 64] = b64dec(id) if type(id) is str else id
+            off += 64
+        return bytes(out)
 
     @classmethod
     def from_tags_stream(cls, tags, stream):
@@ -111,15 +198,23 @@ class ANS104BundleHeader:
     def fromstream(cls, stream):
         entryct = int.from_bytes(stream.read(32), 'little')
 
+        # one read for the whole table, then one compiled unpack pass; real
+        # lengths fit their low 8 bytes, with a slow path just in case
+        table = stream.read(entryct * 64)
+        ifb = int.from_bytes
         length_id_pairs = [
-            (int.from_bytes(stream.read(32), 'little'), b64enc(stream.read(32)))
-            for idx in range(entryct)
+            (low if high == _ZERO24 else low + (ifb(high, 'little') << 64),
+             id)
+            for low, high, id in _LEN_ID.iter_unpack(table)
         ]
 
         return cls(length_id_pairs, version=2)
 
 class ANS104DataItemHeader:
     def __init__(self, tags = [], owner=None, target=None, anchor=None, signature=None, signer=DEFAULT_SIGNER):
+        # derived forms (b64 strings, decoded bytes, the id hash) are
+        # memoized here and dropped by the setters of what they derive from
+        self._cache = {}
         if isinstance(tags, (bytes, bytearray)):
             self.raw_tags = tags
         else:
@@ -141,20 +236,64 @@ class ANS104DataItemHeader:
     def raw_signature_type(self):
         return struct.pack('<H', self.signature_type)
 
+    @property
+    def raw_tags(self):
+        return self._raw_tags
+
+    @raw_tags.setter
+    def raw_tags(self, raw_tags):
+        self._raw_tags = raw_tags
+        self._cache.pop('len_bytes', None)
+        self._cache.pop('avro_end', None)
+
+    @property
+    def signer(self):
+        return self._signer
+
+    @signer.setter
+    def signer(self, signer):
+        self._signer = signer
+        self._cache.pop('len_bytes', None)
+
+    @property
+    def raw_signature(self):
+        return self._raw_signature
+
+    @raw_signature.setter
+    def raw_signature(self, raw_signature):
+        self._raw_signature = raw_signature
+        self._cache.pop('signature', None)
+        self._cache.pop('raw_id', None)
+        self._cache.pop('id', None)
+
     @property
     def signature(self):
-        if len(self.raw_signature):
-            return b64enc(self.raw_signature)
-        else:
-            return None
+        signature = self._cache.get('signature')
+        if signature is None and len(self.raw_signature):
+            signature = b64enc(self.raw_signature)
+            self._cache['signature'] = signature
+        return signature
 
     @signature.setter
     def signature(self, signature):
         self.raw_signature = b64dec(signature)
 
+    @property
+    def raw_owner(self):
+        return self._raw_owner
+
+    @raw_owner.setter
+    def raw_owner(self, raw_owner):
+        self._raw_owner = raw_owner
+        self._cache.pop('owner', None)
+
     @property
     def owner(self):
-        return b64enc(self.raw_owner)
+        owner = self._cache.get('owner')
+        if owner is None:
+            owner = b64enc(self.raw_owner)
+            self._cache['owner'] = owner
+        return owner
 
     @property
     def raw_public_key(self):
@@ -164,40 +303,71 @@ class ANS104DataItemHeader:
     def public_key(self):
         return self.owner
 
+    @property
+    def target(self):
+        return self._target
+
+    @target.setter
+    def target(self, target):
+        self._target = target
+        self._cache.pop('raw_target', None)
+        self._cache.pop('len_bytes', None)
+
     @property
     def raw_target(self):
-        if self.target is not None:
-            return b64dec(self.target)
-        else:
-            return b''
+        raw_target = self._cache.get('raw_target')
+        if raw_target is None:
+            raw_target = b64dec(self.target) if self.target is not None else b''
+            self._cache['raw_target'] = raw_target
+        return raw_target
+
+    @property
+    def anchor(self):
+        return self._anchor
+
+    @anchor.setter
+    def anchor(self, anchor):
+        self._anchor = anchor
+        self._cache.pop('raw_anchor', None)
+        self._cache.pop('len_bytes', None)
 
     @property
     def raw_anchor(self):
-        if self.anchor is not None:
-            return b64dec(self.anchor)
-        else:
-            return b''
+        raw_anchor = self._cache.get('raw_anchor')
+        if raw_anchor is None:
+            raw_anchor = b64dec(self.anchor) if self.anchor is not None else b''
+            self._cache['raw_anchor'] = raw_anchor
+        return raw_anchor
 
     @property
     def raw_nonce(self):
         return self.raw_anchor
-    
+
     @property
     def nonce(self):
         return self.anchor
 
     @property
     def raw_id(self):
-        return SHA256.new(self.raw_signature).digest()
+        raw_id = self._cache.get('raw_id')
+        if raw_id is None:
+            raw_id = hashlib.sha256(self.raw_signature).digest()
+            self._cache['raw_id'] = raw_id
+        return raw_id
 
     @property
     def id(self):
-        return b64enc(self.raw_id)
+        id = self._cache.get('id')
+        if id is None:
+            id = b64enc(self.raw_id)
+            self._cache['id'] = id
+        return id
 
     @property
     def tags(self):
-        stream = io.BytesIO(self.raw_tags)
-        return self.tagsfromstream(stream)
+        tags, pos = self.tagsfrombuffer(self.raw_tags)
+        self._cache['avro_end'] = pos
+        return tags
 
     @tags.setter
     def tags(self, tags):
@@ -205,9 +375,13 @@ class ANS104DataItemHeader:
 
     @property
     def extra_tags_data(self):
-        stream = io.BytesIO(self.raw_tags)
-        self.tagsfromstream(stream)
-        return stream.read()
+        # the end of the avro payload is remembered from the last parse, so
+        # reading tags and then assigning them costs one decode, not two
+        pos = self._cache.get('avro_end')
+        if pos is None:
+            tags, pos = self.tagsfrombuffer(self.raw_tags)
+            self._cache['avro_end'] = pos
+        return self.raw_tags[pos:]
 
     @extra_tags_data.setter
     def extra_tags_data(self, extra_tags_data):
@@ -227,38 +401,31 @@ class ANS104DataItemHeader:
         }
 
     def get_len_bytes(self):
-        total = 2 + self.signer.signature_length + self.signer.owner_length + 2
-        if self.target is not None:
-            total += 32
-        if self.anchor is not None:
-            total += 32
-        total += 16 + len(self.raw_tags)
+        total = self._cache.get('len_bytes')
+        if total is None:
+            total = 2 + self.signer.signature_length + self.signer.owner_length + 2
+            if self.target is not None:
+                total += 32
+            if self.anchor is not None:
+                total += 32
+            total += 16 + len(self.raw_tags)
+            self._cache['len_bytes'] = total
         return total
 
     def tobytes(self):
-        raw = io.BytesIO()
         if self.target is not None:
-            target_struct = '?32s'
             target_values = (True, self.raw_target)
         else:
-            target_struct = '?'
             target_values = (False,)
         if self.anchor is not None:
-            anchor_struct = '?32s'
             anchor_values = (True, self.raw_anchor)
         else:
-            anchor_struct = '?'
             anchor_values = (False,)
         raw_tags = self.raw_tags
-        return struct.pack(
-            (
-                '<H' + # signature type
-                self.signer.signature_structpack + # signature
-                self.signer.owner_structpack + # public key
-                target_struct + # optional receiving address
-                anchor_struct + # antireplay nonce
-                'QQ' # tags count, tags bytelength
-            ),
+        header_struct = self.signer.header_structs[
+            self.target is not None, self.anchor is not None
+        ]
+        return header_struct.pack(
             self.signer.type,
             self.raw_signature,
             self.raw_owner,
@@ -294,15 +461,13 @@ class ANS104DataItemHeader:
         offset = 0
         start_tell = stream.tell()
 
-        signature_type, = struct.unpack('<H', stream.read(2)) # signature type
+        signature_type, = _U16.unpack(stream.read(2)) # signature type
         signer = SIGNERS_BY_TYPE.get(signature_type)
         offset += 2
 
         if signer is None:
             raise Exception(f'unknown signature type: {signature_type}')
-        raw_signature, raw_owner = struct.unpack(
-            signer.signature_structpack + # signature
-            signer.owner_structpack, # public key
+        raw_signature, raw_owner = signer.sig_owner_struct.unpack(
             stream.read(signer.signature_length + signer.owner_length)
         )
         offset += signer.signature_length + signer.owner_length
@@ -329,16 +494,15 @@ class ANS104DataItemHeader:
         else:
             anchor = b''
 
-        tags_len, raw_tags_len = struct.unpack('<QQ', stream.read(16))
+        tags_len, raw_tags_len = _QQ.unpack(stream.read(16))
         offset += 16
 
         if raw_tags_len > 0:
             raw_tags = stream.read(raw_tags_len)
-            raw_tags_stream = io.BytesIO(raw_tags)
-            tags = cls.tagsfromstream(raw_tags_stream)
+            tags, tags_end = cls.tagsfrombuffer(raw_tags)
             offset += raw_tags_len
-            if raw_tags_stream.tell() != raw_tags_len or len(tags) != tags_len:
-                if raw_tags_stream.tell() < raw_tags_len:
+            if tags_end != raw_tags_len or len(tags) != tags_len:
+                if tags_end < raw_tags_len:
                     logger.warn('DataItem tags contains cruft data at end.')
                 else:
                     raise Exception('incorrect tags length')
@@ -362,69 +526,53 @@ class ANS104DataItemHeader:
 
     @staticmethod
     def tagsfromstream(stream):
-        def avrolongdec(stream):
-            # varint encoding is 7-bit little-endian where the 8th bit indicates whether another byte follows
-            zigzag = 0
-            bits = 0
-            while True:
-                byte = stream.read(1)[0]
-                zigzag |= (byte & 0x7f) << bits
-                if byte & 0x80:
-                    bits += 7
-                else:
-                    break
-            # zigzag encoding has the sign bit in the 1s place
-            if zigzag & 1:
-                zigzag = ~zigzag
-            return zigzag >> 1
-        def avrobytesdec(stream):
-            count = avrolongdec(stream)
-            assert count >= 0
-            result = stream.read(count)
-            assert len(result) == count
-            return result
+        buf = stream.read()
+        tags, pos = ANS104DataItemHeader.tagsfrombuffer(buf)
+        # leave the stream positioned after the tag data as before
+        stream.seek(pos - len(buf), io.SEEK_CUR)
+        return tags
+
+    @staticmethod
+    def tagsfrombuffer(buf, pos = 0):
+        # decodes over the buffer with an integer cursor rather than
+        # one-byte stream reads; returns the tags and the end offset
+        longdec = _avrolongdec
         tags = []
         while True:
-            block_items = avrolongdec(stream)
+            block_items, pos = longdec(buf, pos)
             if block_items == 0:
                 break
             elif block_items < 0:
-                block_bytes = avrolongdec(stream)
+                block_bytes, pos = longdec(buf, pos)
                 block_items = -block_items
-            for block_idx in range(block_items):    
-                name = avrobytesdec(stream)
-                value = avrobytesdec(stream)
+            for block_idx in range(block_items):
+                count, pos = longdec(buf, pos)
+                assert count >= 0
+                name = bytes(buf[pos : pos + count])
+                assert len(name) == count
+                pos += count
+                count, pos = longdec(buf, pos)
+                assert count >= 0
+                value = bytes(buf[pos : pos + count])
+                assert len(value) == count
+                pos += count
                 tags.append(create_tag(name, value, True))
-        return tags
+        return tags, pos
 
     @staticmethod
     def tagstobytes(tags):
-        def avrolongenc(num):
-            # zigzag encoding moves the sign bit to the 1s place
-            zigzag = num << 1
-            if zigzag < 0:
-                zigzag = ~zigzag
-            # varint encoding is 7-bit little-endian where the 8th bit indicates whether another byte follows
-            varint = bytearray()
-            while True:
-                byte = zigzag & 0x7f
-                zigzag >>= 7
-                if zigzag:
-                    varint.append(byte | 0x80)
-                else:
-                    varint.append(byte)
-                    return varint
-        def avrobytesenc(data):
-            return avrolongenc(len(data)) + data
-        return b''.join([
-            avrolongenc(len(tags)),
-            *[
-                avrobytesenc(tag[key])
-                for tag in (normalize_tag(tag) for tag in tags)
-                for key in ("name", "value")
-            ],
-            b'\0' if len(tags) else b''
-        ])
+        longenc = _avrolongenc
+        out = bytearray()
+        longenc(out, len(tags))
+        for tag in tags:
+            tag = normalize_tag(tag)
+            for key in ("name", "value"):
+                data = tag[key]
+                longenc(out, len(data))
+                out += data
+        if len(tags):
+            out.append(0)
+        return bytes(out)
 
 class DataItem:
     def __init__(self, header = None, data = b'', version = 2):
@@ -433,8 +581,25 @@ class DataItem:
             header = ANS104DataItemHeader()
         self.header = header
         self.version = version
+        self._sig_data_cache = None
 
     def get_raw_signature_data(self):
+        header = self.header
+        # the digest is cached against the exact inputs it was built from;
+        # comparing them is a memcmp, far cheaper than rehashing, and keeps
+        # the cache honest when header fields or data are reassigned
+        inputs = (
+            int(self.version),
+            header.signature_type,
+            header.raw_owner,
+            header.raw_target,
+            header.raw_anchor,
+            header.raw_tags,
+            self.data,
+        )
+        cached = self._sig_data_cache
+        if cached is not None and cached[0] == inputs:
+            return cached[1]
         items = [
             b'dataitem',
             b'1'
@@ -454,7 +619,9 @@ class DataItem:
                 for tag in self.header.tags
             ])
         items.append(self.data)
-        return deep_hash(items)
+        result = deep_hash(items)
+        self._sig_data_cache = (inputs, result)
+        return result
 
     def sign(self, private_key):
         self.header.raw_owner = self.header.signer.raw_owner(private_key)
@@ -462,21 +629,23 @@ class DataItem:
         return self.header.id
 
     def verify(self):
-        if len(self.header.tags) > 128:
+        tags = self.header.tags # decoded from raw_tags on each access
+        if len(tags) > 128:
             return False
         if len(self.header.raw_anchor) > 32:
             return False
-        for tag in self.header.tags:
+        for tag in tags:
             if len(tag.keys()) > 2 or 'name' not in tag or 'value' not in tag:
                 return False
-            for key, value in tag.items():
-                if len(value) == 0:
-                    return False
-        if len(tag['name']) > 1024:
-            return False
-        if len(tag['value']) > 3072:
-            return False
-        public_key = self.header.signer.public_key(self.header.raw_owner)
+            name = tag['name']
+            value = tag['value']
+            # the size limits used to be checked outside the loop, so only
+            # the last tag was held to them (and no tags meant a NameError)
+            if not 0 < len(name) <= 1024:
+                return False
+            if not 0 < len(value) <= 3072:
+                return False
+        public_key = self.header.signer.public_key(self.header.raw_owner, consistency_check=False)
         return self.header.signer.verify(public_key, self.get_raw_signature_data(), self.header.raw_signature)
 
     def tojson(self):
@@ -502,7 +671,7 @@ class DataItem:
         elif fmt == b'binary':
             header = ANS104BundleHeader.fromstream(stream)
             offset = header.get_len_bytes()
-            for length, id in header.length_id_pairs:
+            for length, id in header._length_id_pairs:
                 dataitem = cls.fromstream(stream, length=length)
                 offset += length
                 yield dataitem
@@ -534,14 +703,15 @@ class Bundle:
             dataitem.sign(private_key)
 
     def verify(self):
-        return all([dataitem.verify() for dataitem in self.dataitems])
+        # generator form stops hashing and verifying at the first failure
+        return all(dataitem.verify() for dataitem in self.dataitems)
 
     @property
     def header(self):
-        return ANS104BundleHeader({
-            item.header.id: item.get_len_bytes()
+        return ANS104BundleHeader([
+            (item.get_len_bytes(), item.header.id)
             for item in self.dataitems
-        })
+        ])
 
     def tojson(self):
         return {
@@ -552,7 +722,21 @@ class Bundle:
         }
 
     def tobytes(self):
-        return self.header.tobytes() + b''.join([item.tobytes() for item in self.dataitems])
+        # write every region into one preallocated buffer; item.tobytes()
+        # would copy each item's data an extra time just to concatenate it
+        # with its header
+        dataitems = self.dataitems
+        header = self.header
+        off = header.get_len_bytes()
+        out = bytearray(off + sum(item.get_len_bytes() for item in dataitems))
+        out[:off] = header.tobytes()
+        for item in dataitems:
+            raw_header = item.header.tobytes()
+            end = off + len(raw_header)
+            out[off:end] = raw_header
+            off = end + len(item.data)
+            out[end:off] = item.data
+        return bytes(out)
     
     @classmethod
     def fromjson(cls, json):
@@ -567,5 +751,5 @@ class Bundle:
     @classmethod
     def fromstream(cls, stream):
         header = ANS104BundleHeader.fromstream(stream)
-        dataitems = [DataItem.fromstream(stream, length) for length, id in header.length_id_pairs]
+        dataitems = [DataItem.fromstream(stream, length) for length, id in header._length_id_pairs]
         return cls(dataitems, version = 2)
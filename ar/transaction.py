@@ -101,7 +101,11 @@ class Transaction(object):
 
     @classmethod
     def fromstream(cls, stream):
-        bintx = arbindec(stream, 24)
+        return cls.frombody(arbindec(stream, 24))
+
+    @classmethod
+    def frombody(cls, bintx):
+        # parses one unframed tx body, as sliced out of a block or tx frame
         if len(bintx) == 32:
             return b64enc(bintx)
         stream = io.BytesIO(bintx)
@@ -1,3 +1,6 @@
+import struct
+from functools import lru_cache
+
 from Crypto.Hash import SHA256
 from Crypto.PublicKey import RSA
 from Crypto.Signature import pss
@@ -23,7 +26,7 @@ class Signer:
         raise NotImplementedError(cls.__name__ + '.raw_owner')
 
     @classmethod
-    def public_key(cls, raw_owner):
+    def public_key(cls, raw_owner, consistency_check = True):
         raise NotImplementedError(cls.__name__ + '.public_key')
 
 class Arweave(Signer): # rsa4096pss
@@ -57,8 +60,17 @@ class Arweave(Signer): # rsa4096pss
 
     @staticmethod
     def public_key(raw_owner, consistency_check = True):
+        if not consistency_check:
+            return _rsa_public_key(bytes(raw_owner))
         return RSA.construct((bytes_to_long(raw_owner), 65537), consistency_check=consistency_check)
 
+@lru_cache(maxsize=256)
+def _rsa_public_key(raw_owner):
+    # reconstructing the same owner's key per verification is redundant; the
+    # consistency check is skipped because signature verification itself
+    # rejects corrupt key material
+    return RSA.construct((bytes_to_long(raw_owner), 65537), consistency_check=False)
+
 Rsa4096Pss = Arweave
 
 class Ed25519(Signer):
@@ -109,5 +121,23 @@ BY_TYPE = {
 for signer in BY_TYPE.values():
     signer.owner_structpack = str(signer.owner_length) + 's'
     signer.signature_structpack = str(signer.signature_length) + 's'
+    # precompiled signature+owner layout, and full DataItem header layouts
+    # keyed by (target present, anchor present), so serialization does not
+    # reparse a format string per item
+    signer.sig_owner_struct = struct.Struct(
+        signer.signature_structpack + signer.owner_structpack
+    )
+    signer.header_structs = {
+        (target, anchor): struct.Struct(
+            '<H' + # signature type
+            signer.signature_structpack + # signature
+            signer.owner_structpack + # public key
+            ('?32s' if target else '?') + # optional receiving address
+            ('?32s' if anchor else '?') + # antireplay nonce
+            'QQ' # tags count, tags bytelength
+        )
+        for target in (False, True)
+        for anchor in (False, True)
+    }
 
 DEFAULT = Rsa4096Pss
@@ -38,3 +38,18 @@ def deep_hash_chunks(chunks, acc):
     new_acc = hashlib.sha384(hash_pair).digest()
 
     return deep_hash_chunks(chunks[1:], new_acc)
+
+
+class DeepHasher:
+    # incremental form of deep_hash over a list of a known length, so
+    # callers can push items one at a time instead of building the list
+
+    def __init__(self, count):
+        self.acc = hashlib.sha384(b'list' + str(count).encode()).digest()
+
+    def update(self, data):
+        # data may be bytes or a nested list, as with deep_hash
+        self.acc = hashlib.sha384(self.acc + deep_hash(data)).digest()
+
+    def digest(self):
+        return self.acc
@@ -1,13 +1,18 @@
-from jose.utils import base64url_decode, base64url_encode
+try:
+    # SIMD-accelerated drop-in for the stdlib base64 module
+    import pybase64 as _base64
+except ImportError:
+    import base64 as _base64
 
 from .. import ArweaveException
 
 
 def b64dec(data):
-    return base64url_decode(utf8enc_if_not_bytes(data))
+    data = utf8enc_if_not_bytes(data)
+    return _base64.urlsafe_b64decode(data + b'=' * (-len(data) % 4))
 
 def b64enc(data):
-    return base64url_encode(data).decode()
+    return _base64.urlsafe_b64encode(data).rstrip(b'=').decode()
 
 def b64enc_if_not_str(data):
     if data is None:
@@ -15,7 +20,7 @@ def b64enc_if_not_str(data):
     elif type(data) is str:
         return data
     else:
-        return base64url_encode(data).decode()
+        return b64enc(data)
 
 def b64dec_if_not_bytes(data):
     if data is None:
@@ -23,7 +28,7 @@ def b64dec_if_not_bytes(data):
     elif isinstance(data, (bytes, bytearray)):
         return data
     else:
-        return base64url_decode(data.encode())
+        return b64dec(data)
 
 def utf8enc_if_not_bytes(data):
     if data is None:
@@ -1,19 +1,46 @@
+import hashlib
 import json
 
-from Crypto.Hash import SHA256
 from Crypto.PublicKey import RSA
 from Crypto.Signature import PKCS1_PSS
 from jose import jwk
-from jose.utils import base64url_decode
 
 from . import DEFAULT_API_URL
 from .peer import Peer
 from .utils import (
+    b64dec,
     owner_to_address,
     winston_to_ar,
 )
 
 
+def _jwk_int(value):
+    return int.from_bytes(b64dec(value), 'big')
+
+
+class _HashlibSHA256:
+    # quacks like Crypto.Hash.SHA256 as far as PKCS1_PSS needs, while the
+    # hashing itself goes through hashlib/OpenSSL, which dispatches to the
+    # CPU SHA extensions when present
+    digest_size = 32
+
+    def __init__(self, data = b''):
+        self._hash = hashlib.sha256(data)
+
+    @staticmethod
+    def new(data = b''):
+        return _HashlibSHA256(data)
+
+    def update(self, data):
+        self._hash.update(data)
+
+    def digest(self):
+        return self._hash.digest()
+
+    def hexdigest(self):
+        return self._hash.hexdigest()
+
+
 class Wallet(object):
     HASH = 'sha256'
 
@@ -24,9 +51,19 @@ class Wallet(object):
             with open(jwk_file, 'r') as j_file:
                 self.jwk_data = json.loads(j_file.read())
 
-        self.jwk_data['p2s'] = ''
-        self.jwk = jwk.construct(self.jwk_data, algorithm=jwk.ALGORITHMS.RS256)
-        self.rsa = RSA.importKey(self.jwk.to_pem())
+        # build the key straight from the JWK integers; going through jose
+        # and PEM parsed the same key material three times over
+        jwk_data = self.jwk_data
+        components = [_jwk_int(jwk_data['n']), _jwk_int(jwk_data['e'])]
+        if 'd' in jwk_data:
+            components.append(_jwk_int(jwk_data['d']))
+            if 'p' in jwk_data and 'q' in jwk_data:
+                components.append(_jwk_int(jwk_data['p']))
+                components.append(_jwk_int(jwk_data['q']))
+        self.rsa = RSA.construct(tuple(components))
+        # the PSS scheme object is stateless between calls, so one instance
+        # serves every sign/verify for this key
+        self._pss = PKCS1_PSS.new(self.rsa)
 
         self.owner = self.jwk_data.get('n')
         self.address = owner_to_address(self.owner)
@@ -62,16 +99,16 @@ class Wallet(object):
 
     @property
     def raw_owner(self):
-        return base64url_decode(self.jwk_data['n'].encode())
+        return b64dec(self.jwk_data['n'])
 
     def sign(self, message):
-        h = SHA256.new(message)
-        signed_data = PKCS1_PSS.new(self.rsa).sign(h)
+        h = _HashlibSHA256(message)
+        signed_data = self._pss.sign(h)
         return signed_data
 
     def verify(self, message, signed_data):
-        h = SHA256.new(message)
-        status = PKCS1_PSS.new(self.rsa).verify(h, signed_data)
+        h = _HashlibSHA256(message)
+        status = self._pss.verify(h, signed_data)
         return status
 
     def get_last_transaction_id(self):
@@ -30,12 +30,17 @@ setup(
   ],
   packages = find_packages(),
   install_requires=[ # try to reduce these
-    'arrow', # used only in transaction_uploader.py for some timing thing
     'python-jose', # for jwk parsing: note use of jwk is very simple, likely this is unneeded
     'pycryptodome', # core crypto backend
     'requests', # core network backend
+    'sortedcontainers', # ordered completion tracking in transaction_uploader.py
     'erlang_py', # for decoding some rare binary peer data
     #'git+https://github.com/jtgrassie/pyrx', # for block validation, could be made optional if there is a trusted node
     # note: pyrx is only available via git url; RandomX is on pypi
   ],
+  extras_require={
+    'speedups': [
+      'pybase64', # SIMD base64; picked up automatically if installed
+    ],
+  },
 )
@@ -86,6 +86,27 @@ def test_serialize_unsigned():
     dataitem = DataItem.frombytes(dataitem.tobytes())
     assert dataitem.verify()
 
+def test_verify_tag_limits():
+    # an oversized name is rejected wherever it sits, not just in the last tag
+    dataitem = DataItem(ANS104DataItemHeader(tags = [
+        {'name': b'x' * 1025, 'value': b'value'},
+        {'name': b'name', 'value': b'value'},
+    ]), data = b'Hello, world.')
+    dataitem.sign(wallet.rsa)
+    assert not dataitem.verify()
+
+    # empty names and values are rejected
+    dataitem = DataItem(ANS104DataItemHeader(tags = [
+        {'name': b'name', 'value': b''},
+    ]), data = b'Hello, world.')
+    dataitem.sign(wallet.rsa)
+    assert not dataitem.verify()
+
+def test_verify_no_tags():
+    dataitem = DataItem(ANS104DataItemHeader(), data = b'Hello, world.')
+    dataitem.sign(wallet.rsa)
+    assert dataitem.verify()
+
 def test_ans104_verification():
     ans104_bytes = b64dec(
         'AgAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA7BAAAAAAAAAAAAAAAAAAAA' +
@@ -280,5 +301,7 @@ wallet = Wallet(jwk_data = {
 
 if __name__ == '__main__':
     test_serialize_unsigned()
+    test_verify_tag_limits()
+    test_verify_no_tags()
     test_ans104_verification()
     test_ans102_verification()
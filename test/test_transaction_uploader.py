@@ -0,0 +1,183 @@
+# This file is part of PyArweave.
+#
+# PyArweave is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 2 of the License, or (at your option) any later
+# version.
+#
+# PyArweave is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# PyArweave. If not, see <https://www.gnu.org/licenses/>.
+
+import io
+import json
+import os
+import threading
+
+import pytest
+
+import ar.utils.transaction_uploader as transaction_uploader
+from ar.utils import b64enc
+from ar.utils.merkle import CHUNK_SIZE, generate_transaction_chunks
+from ar.utils.transaction_uploader import (
+    TransactionUploader,
+    TransactionUploaderException,
+    download_chunked_data,
+)
+
+
+class StubTransaction:
+    # just enough of Transaction for the uploader: prepared chunks and
+    # the same get_chunk dict shape, no wallet or network
+    api_url = 'http://localhost:1984'
+
+    def __init__(self, data):
+        self.data = b''
+        self.data_size = len(data)
+        self.file_handler = io.BytesIO(data)
+        self.chunks = generate_transaction_chunks(self.file_handler)
+        self.data_root = self.chunks.get('data_root')
+
+    def get_chunk(self, idx):
+        proof = self.chunks.get('proofs')[idx]
+        chunk = self.chunks.get('chunks')[idx]
+        self.file_handler.seek(chunk.min_byte_range)
+        chunk_data = self.file_handler.read(chunk.data_size)
+        return {
+            'data_root': self.data_root,
+            'data_size': str(self.data_size),
+            'data_path': b64enc(proof.proof),
+            'offset': str(proof.offset),
+            'chunk': b64enc(chunk_data),
+        }
+
+
+class StubResponse:
+    def __init__(self, status_code, text=''):
+        self.status_code = status_code
+        self.text = text
+
+
+class StubSession:
+    def __init__(self, fail_offset=None):
+        self.posted_offsets = []
+        self.fail_offset = fail_offset
+        self._lock = threading.Lock()
+
+    def post(self, url, data=None, headers=None):
+        offset = int(json.loads(data)['offset'])
+        with self._lock:
+            self.posted_offsets.append(offset)
+        if offset == self.fail_offset:
+            return StubResponse(500, 'stub failure')
+        return StubResponse(200, 'OK')
+
+    def close(self):
+        pass
+
+
+def make_uploader(data, session):
+    transaction = StubTransaction(data)
+    return TransactionUploader(
+        transaction=transaction,
+        file_handler=io.BytesIO(data),
+        tx_posted=True,
+        session=session,
+    )
+
+
+def test_upload_all():
+    data = os.urandom(2 * CHUNK_SIZE + 12345)
+    session = StubSession()
+    uploader = make_uploader(data, session)
+
+    uploader.upload_all(max_workers=4)
+
+    assert uploader.is_complete
+    assert uploader.chunk_index == uploader.total_chunks
+    expected_offsets = {
+        int(uploader.transaction.get_chunk(idx)['offset'])
+        for idx in range(uploader.total_chunks)
+    }
+    assert sorted(session.posted_offsets) == sorted(expected_offsets)
+
+
+def test_upload_all_failure():
+    data = os.urandom(2 * CHUNK_SIZE + 12345)
+    transaction = StubTransaction(data)
+    # fail the middle chunk; the contiguous prefix can then never pass it
+    fail_offset = int(transaction.get_chunk(1)['offset'])
+    session = StubSession(fail_offset=fail_offset)
+    uploader = TransactionUploader(
+        transaction=transaction,
+        file_handler=io.BytesIO(data),
+        tx_posted=True,
+        session=session,
+    )
+
+    with pytest.raises(TransactionUploaderException):
+        uploader.upload_all(max_workers=4)
+
+    assert not uploader.is_complete
+    assert uploader.chunk_index <= 1
+
+
+START_OFFSET = 1000000
+
+
+def stub_weave(monkeypatch, data, boundaries):
+    # serve data as chunks split at the given relative boundaries, the way
+    # a peer returns the chunk containing a requested absolute offset
+    def get_transaction_offset(tx_id, api_url=None):
+        return {
+            'size': str(len(data)),
+            'offset': str(START_OFFSET + len(data) - 1),
+        }
+
+    def get_chunk_data(offset, api_url=None):
+        relative = offset - START_OFFSET
+        for start, end in zip(boundaries, boundaries[1:]):
+            if start <= relative < end:
+                return data[start:end]
+        raise AssertionError('offset {} out of range'.format(offset))
+
+    monkeypatch.setattr(
+        transaction_uploader, 'get_transaction_offset', get_transaction_offset
+    )
+    monkeypatch.setattr(transaction_uploader, 'get_chunk_data', get_chunk_data)
+
+
+def test_download_chunked_data(monkeypatch):
+    data = os.urandom(2 * CHUNK_SIZE + 100)
+    boundaries = [0, CHUNK_SIZE, 2 * CHUNK_SIZE, len(data)]
+    stub_weave(monkeypatch, data, boundaries)
+
+    assert download_chunked_data('txid') == data
+
+
+def test_download_chunked_data_ragged(monkeypatch):
+    # an undersized first chunk forces the concurrent prefetch to fall
+    # back to the sequential walk
+    data = os.urandom(CHUNK_SIZE + 2000)
+    boundaries = [0, 1000, CHUNK_SIZE + 1000, len(data)]
+    stub_weave(monkeypatch, data, boundaries)
+
+    assert download_chunked_data('txid') == data
+
+
+def test_download_chunked_data_file_handler(monkeypatch):
+    data = os.urandom(CHUNK_SIZE + 100)
+    boundaries = [0, CHUNK_SIZE, len(data)]
+    stub_weave(monkeypatch, data, boundaries)
+
+    file_handler = io.BytesIO()
+    assert download_chunked_data('txid', file_handler=file_handler) is None
+    assert file_handler.getvalue() == data
+
+
+if __name__ == '__main__':
+    test_upload_all()
+    test_upload_all_failure()